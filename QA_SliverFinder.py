@@ -117,47 +117,160 @@ def CreateWebMercaturSR():
         errorMsg()
 
 ## ===================================================================================
-def GetAngleFromPoints(pntList, iPnt):
-    # Calculate angle from 3 pairs of cartesian coordinates
+def GetExteriorRings(wkb):
+    # Read the exterior ring of each polygon in a WKB Polygon or MultiPolygon.
+    # The coordinates are viewed directly from the WKB buffer, interior rings are
+    # stepped over without being read. Returns a list of (N,2) arrays.
     #
     try:
-        #x1 = pntList[0][0]
-        #y1 = pntList[0][1]
-        #x2 = pntList[1][0]
-        #y2 = pntList[1][1]
-        #x3 = pntList[2][0]
-        #y3 = pntList[2][1]
-
-        # A->B
-        dx = pntList[1 + iPnt][0] - pntList[0 + iPnt][0]
-        dy = pntList[1 + iPnt][1] - pntList[0 + iPnt][1]
-        mAB = math.sqrt(dx**2 + dy**2)
-
-        # B->C
-        dx = pntList[2 + iPnt][0] - pntList[1 + iPnt][0]
-        dy = pntList[2 + iPnt][1] - pntList[1 + iPnt][1]
-        mBC = math.sqrt(dx**2 + dy**2)
-
-        # C->A
-        dx = pntList[0 + iPnt][0] - pntList[2 + iPnt][0]
-        dy = pntList[0 + iPnt][1] - pntList[2 + iPnt][1]
-        mCA = math.sqrt(dx**2 + dy**2)
-
-        if mAB == 0 or mBC == 0:
-            AddMsgAndPrint("Failed to calculate angle at point " + str(iPnt), 0)
-            return 0
+        rings = list()
+
+        def readHeader(offset):
+            # byte order, geometry type and the number of coordinates per point
+            bo = "<" if wkb[offset] == 1 else ">"
+            geomType = uintStruct[bo].unpack_from(wkb, offset + 1)[0]
+            baseType = (geomType & 0xFFFF) % 1000
+            isoDims = (geomType & 0xFFFF) // 1000
+            nDims = 2 + (isoDims in (1, 3) or bool(geomType & 0x80000000)) + (isoDims in (2, 3) or bool(geomType & 0x40000000))
+            return bo, baseType, nDims, offset + 5
+
+        def readPolygon(offset):
+            bo, baseType, nDims, offset = readHeader(offset)
+            numRings = uintStruct[bo].unpack_from(wkb, offset)[0]
+            offset += 4
+
+            for iRing in range(numRings):
+                numPoints = uintStruct[bo].unpack_from(wkb, offset)[0]
+                offset += 4
+
+                if iRing == 0:
+                    pts = np.frombuffer(wkb, dtype=bo + "f8", count=numPoints * nDims, offset=offset)
+                    rings.append(pts.reshape(-1, nDims)[:, 0:2])
+
+                offset += numPoints * nDims * 8
+
+            return offset
+
+        bo, baseType, nDims, offset = readHeader(0)
+
+        if baseType == 3:
+            # Polygon
+            readPolygon(0)
+
+        elif baseType == 6:
+            # MultiPolygon, each polygon has its own header
+            numPolys = uintStruct[bo].unpack_from(wkb, offset)[0]
+            offset += 4
 
-        p = round((mAB**2 + mBC**2 - mCA**2 ) / (2 * mAB * mBC),10)
-        theAngle = int(round(math.degrees(math.acos(p)), 0))
+            for iPoly in range(numPolys):
+                offset = readPolygon(offset)
 
-        #if theAngle > 180:
-        #    theAngle -= 180
+        return rings
 
-        return theAngle
+    except:
+        errorMsg()
+        return list()
+
+## ===================================================================================
+def GetAngleFromPoints(pts):
+    # Calculate the angle at every vertex of a polygon ring in one pass.
+    # pts is an (N,2) array of cartesian coordinates for a ring without the closing vertex;
+    # angles[i] is the angle at pts[i] between its neighbors pts[i - 1] and pts[i + 1],
+    # wrapping around at either end of the ring
+    #
+    try:
+        # B->A and B->C
+        vAB = np.roll(pts, 1, axis=0) - pts
+        vBC = np.roll(pts, -1, axis=0) - pts
+        cross = vAB[:,0] * vBC[:,1] - vAB[:,1] * vBC[:,0]
+        dot = vAB[:,0] * vBC[:,0] + vAB[:,1] * vBC[:,1]
+
+        # zero-length segments (duplicate vertices) are reported as 0 degree angles
+        for iPnt in np.flatnonzero((cross == 0) & (dot == 0)):
+            AddMsgAndPrint("Failed to calculate angle at point " + str(iPnt), 0)
+
+        # atan2 has no domain restrictions so the cosine does not have to be clamped
+        theAngles = np.degrees(np.arctan2(np.abs(cross), dot)).round().astype(int)
+
+        return theAngles
 
     except:
         errorMsg()
-        return -1
+        return np.empty(0, dtype=int)
+
+## ===================================================================================
+def ScanAngles(pts, minAngle):
+    # Loop version of GetAngleFromPoints that only returns the flagged vertices.
+    # When numba is installed this function is wrapped with njit (see MAIN) so that the
+    # angle for each vertex is calculated in a single pass without any temporary arrays.
+    # numba compiles it on the first call in ProcessLayer, or loads it from the cache
+    # written by an earlier run, so that first call includes the compile time.
+    # There is no try/except here because numba cannot compile it.
+    #
+    # Returns the index of each flagged vertex in pts and its angle in degrees
+    numPnts = pts.shape[0]
+    flagIdx = np.empty(numPnts, np.int64)
+    flagAngles = np.empty(numPnts, np.int64)
+    iFlag = 0
+
+    for i in range(numPnts):
+        # neighbors of vertex i, wrapping around the ends of the ring
+        iPrev = i - 1 if i > 0 else numPnts - 1
+        iNext = i + 1 if i < numPnts - 1 else 0
+
+        # B->A and B->C
+        dx1 = pts[iPrev, 0] - pts[i, 0]
+        dy1 = pts[iPrev, 1] - pts[i, 1]
+        dx2 = pts[iNext, 0] - pts[i, 0]
+        dy2 = pts[iNext, 1] - pts[i, 1]
+        cross = dx1 * dy2 - dy1 * dx2
+        dot = dx1 * dx2 + dy1 * dy2
+
+        # a duplicate vertex gives atan2(0, 0) which is reported as a 0 degree angle
+        theAngle = int(round(math.degrees(math.atan2(abs(cross), dot))))
+
+        if theAngle <= minAngle:
+            flagIdx[iFlag] = i
+            flagAngles[iFlag] = theAngle
+            iFlag += 1
+
+    return flagIdx[:iFlag], flagAngles[:iFlag]
+
+## ===================================================================================
+def ScanAllAngles(coords, offsets, minAngle):
+    # Run ScanAngles on every ring, where ring i is stored in coords[offsets[i]:offsets[i + 1]].
+    # With numba the rings are split between threads (prange). Each ring writes its flagged
+    # vertices into its own slice of the output buffers, then the slices are gathered in ring order.
+    #
+    # Returns the ring number, the index of each flagged vertex in that ring and its angle
+    numRings = offsets.shape[0] - 1
+    ringIdx = np.empty(coords.shape[0], np.int64)
+    ringAngles = np.empty(coords.shape[0], np.int64)
+    ringCounts = np.zeros(numRings, np.int64)
+
+    for iRing in prange(numRings):
+        iStart = offsets[iRing]
+        flagIdx, flagAngles = ScanAngles(coords[iStart:offsets[iRing + 1]], minAngle)
+        nFlags = flagIdx.shape[0]
+        ringIdx[iStart:iStart + nFlags] = flagIdx
+        ringAngles[iStart:iStart + nFlags] = flagAngles
+        ringCounts[iRing] = nFlags
+
+    nFlags = ringCounts.sum()
+    flagRings = np.empty(nFlags, np.int64)
+    flagIdx = np.empty(nFlags, np.int64)
+    flagAngles = np.empty(nFlags, np.int64)
+    iFlag = 0
+
+    for iRing in range(numRings):
+        iStart = offsets[iRing]
+        nRing = ringCounts[iRing]
+        flagRings[iFlag:iFlag + nRing] = iRing
+        flagIdx[iFlag:iFlag + nRing] = ringIdx[iStart:iStart + nRing]
+        flagAngles[iFlag:iFlag + nRing] = ringAngles[iStart:iStart + nRing]
+        iFlag += nRing
+
+    return flagRings, flagIdx, flagAngles
 
 ## ===================================================================================
 def ProcessLayer(inLayer, outputSR, minAngle, iSelection):
@@ -167,97 +280,80 @@ def ProcessLayer(inLayer, outputSR, minAngle, iSelection):
     try:
 
         # Begin processing...
-        AddMsgAndPrint("\nLocating polygon angles less than " + str(minAngle) + chr(176)) #.decode(locale.getpreferredencoding()), 0)
+        AddMsgAndPrint("\nLocating polygon angles less than " + str(minAngle) + DEG) #.decode(locale.getpreferredencoding()), 0)
 
-        # Process input featurelayer polygon geometry using search cursor
+        # Process input featurelayer polygon geometry using search cursor. The cursor is drained
+        # into a list of (fid, wkb) rows first so that nothing else happens between reads.
         arcpy.SetProgressorLabel("Reading polygon geometry...")
-        arcpy.SetProgressor("step", "Reading polygon geometry...",  0, iSelection, 1)
-        iErr = 0
-        fieldList = ["OID@", "SHAPE@"]
-        dLines = dict()
-        dTest = dict()  # this dictionary will only contain the common key and the angle (for sorting by angle)
-        iPnt = 0
+        fieldList = ["OID@", "SHAPE@WKB"]
         badPolys = list()
 
         with arcpy.da.SearchCursor(inLayer, fieldList,"",outputSR) as sCursor:
-            # open searchcursor on input layer and read geometry one record at a time
-
-            for row in sCursor:
-                iPnt = 0
-                iPart = 0
-                fid = row[0]
-                feat = row[1]
-                #fid, feat = row # do I need to worry about NULL geometry here?
-                #AddMsgAndPrint("Processing polygon FID " + str(fid))
-
-                try:
-                    # geometry object must have a feature associated
-                    if not feat is None:
-
-                        # geometry object has at least 1 polygon
-                        if feat.partCount > 0:
-
-                            #AddMsgAndPrint("\nPolygon #" + str(fid) + " with " + str(feat.partCount) + " parts and " + splitThousands(feat.pointCount) + " points")
+            polyRows = list(sCursor)
 
-                            # Iterate through the polygon geometry object
-                            for part in feat:
+        # exterior rings for every polygon are copied into one coordinate buffer that is
+        # doubled in size whenever it fills up. Ring i is stored in coords[offsets[i]:offsets[i + 1]]
+        # and ringFids[i] is its polygon id. All of the rings are checked together once the
+        # geometry has been parsed.
+        arcpy.SetProgressor("step", "Parsing polygon geometry...",  0, len(polyRows), 1)
+        coords = np.empty((65536, 2), dtype=np.float64)
+        nCoords = 0
+        offsets = [0]
+        ringFids = list()
 
-                                # accumulate 3 points for each segment
-                                pntList = []  # initialize points list for polygon
-                                #AddMsgAndPrint("\tPart " + str(iPart) + " has " + str(len(part)) + " vertices")
+        # the progressor is only updated about 20 times a second instead of once per polygon
+        lastUpdate = time.monotonic()
 
-                                # iterate through the invidual vertices of polygon
-                                for pnt in part:
-                                    if pnt:
-                                        # add vertice or to-node coordinates to list
-                                        #AddMsgAndPrint(str(iPnt) + ", " + str(pnt.X) + ", " + str(pnt.Y))
-                                        pntList.append((pnt.X,pnt.Y))
-                                        iPnt += 1
+        for iPoly, (fid, feat) in enumerate(polyRows, 1):
 
-                                    else:
-                                        # interior ring encountered, don't process any more
-                                        # This means that islands that belong to other survey areas will NOT be checked for slivers
-                                        #AddMsgAndPrint(" \nIsland Polygon encountered", 1)
-                                        break
+            try:
+                # geometry object must have a feature associated
+                if not feat is None:
 
-                                # add vertex 1 to wrap around again
-                                pntList.append(pntList[1])
-                                #AddMsgAndPrint("Wrap" + ", " + str(pntList[1][0]) + ", " + splitThousands(pntList[1][1]))
-                                iPart += 1
+                    # exterior ring of each part. Interior rings are skipped.
+                    # This means that islands that belong to other survey areas will NOT be checked for slivers
+                    rings = GetExteriorRings(feat)
 
-                            numPnts = len(pntList) - 2  # Problem with only 3 of 4 angles being detected
+                    # geometry object has at least 1 polygon
+                    if len(rings) > 0:
 
-                            for iPnt in range(numPnts):
-                                try:
-                                    theAngle = GetAngleFromPoints(pntList, iPnt)
+                        for pts in rings:
+                            # drop the closing vertex, the angle calculations wrap around the ring
+                            if len(pts) > 1 and (pts[0] == pts[-1]).all():
+                                pts = pts[:-1]
 
-                                    if theAngle <= minAngle:
-                                        iErr += 1
-                                        arcpy.SetProgressorLabel("Reading polygon geometry (" + str(iErr) + " locations flagged)")
-                                        # save these 3 coordinate pairs to the dictionary for later use
-                                        dLines[iErr] = ( [(pntList[0 + iPnt][0], pntList[0 + iPnt][1]), (pntList[1 + iPnt][0], pntList[1 + iPnt][1]), (pntList[2 + iPnt][0], pntList[2 + iPnt][1])], fid, theAngle)
-                                        dTest[iErr] = theAngle
-                                        iPnt += 1
+                            numPoints = len(pts)
 
-                                except:
-                                    break
+                            if nCoords + numPoints > coords.shape[0]:
+                                newCoords = np.empty((max(coords.shape[0] * 2, nCoords + numPoints), 2), dtype=np.float64)
+                                newCoords[:nCoords] = coords[:nCoords]
+                                coords = newCoords
 
-                            arcpy.SetProgressorPosition()
+                            coords[nCoords:nCoords + numPoints] = pts
+                            nCoords += numPoints
+                            offsets.append(nCoords)
+                            ringFids.append(fid)
 
-                        else:
-                            # Geometry error: Polygon Part with no parts
-                            badPolys.append(str(fid))
-                            #return False
+                        if time.monotonic() - lastUpdate > 0.05:
+                            arcpy.SetProgressorPosition(iPoly)
+                            lastUpdate = time.monotonic()
 
                     else:
-                        # Geometry error: Polygon with NULL geometry
+                        # Geometry error: Polygon Part with no parts
                         badPolys.append(str(fid))
                         #return False
 
-                except:
-                    AddMsgAndPrint("FID: " + str(fid) + " ---- FEAT: " + str(feat),2)
-                    errorMsg()
+                else:
+                    # Geometry error: Polygon with NULL geometry
+                    badPolys.append(str(fid))
+                    #return False
 
+            except:
+                AddMsgAndPrint("FID: " + str(fid) + " ---- FEAT: " + str(feat),2)
+                errorMsg()
+
+        arcpy.SetProgressorPosition(len(polyRows))
+        del polyRows
         arcpy.ResetProgressor()
 
         # If errors are found in the polygon geometry, report and then return an error
@@ -265,69 +361,104 @@ def ProcessLayer(inLayer, outputSR, minAngle, iSelection):
             AddMsgAndPrint("Bad polygon geometry detected for the following polygons: " + ", ".join(badPolys) + " \n ", 2)
             return False
 
-        # Create a copy of the dLines dictionary, sorted by angle
-        # This dictionary will be used to create the output layers, smallest angles first
-        dAngles = OrderedDict(sorted(dTest.items(), key=lambda x: x[1]))
+        # calculate the angles for all of the rings
+        arcpy.SetProgressorLabel("Calculating polygon angles...")
+
+        if len(ringFids) > 0:
+            coords = coords[:nCoords]
+            offsets = np.asarray(offsets, dtype=np.int64)
+            ringFids = np.asarray(ringFids, dtype=np.int64)
+
+            if bNumba:
+                flagRings, flagIdx, flagAngles = ScanAllAngles(coords, offsets, minAngle)
+
+            else:
+                flagRings = list()
+                flagIdx = list()
+                flagAngles = list()
+
+                for iRing in range(len(ringFids)):
+                    theAngles = GetAngleFromPoints(coords[offsets[iRing]:offsets[iRing + 1]])
+                    ringIdx = np.flatnonzero(theAngles <= minAngle)
+                    flagRings.append(np.full(len(ringIdx), iRing, dtype=np.int64))
+                    flagIdx.append(ringIdx)
+                    flagAngles.append(theAngles[ringIdx])
+
+                flagRings = np.concatenate(flagRings)
+                flagIdx = np.concatenate(flagIdx)
+                flagAngles = np.concatenate(flagAngles)
+
+        else:
+            flagRings = flagIdx = flagAngles = np.empty(0, dtype=np.int64)
+
+        # flagged vertices are stored in a record array:
+        # polygon id, angle and the 3 coordinate pairs (x0,y0,x1,y1,x2,y2) for each location
+        iErr = len(flagIdx)
+        hits = np.empty(iErr, dtype=[("fid", "i8"), ("angle", "i4"), ("coords", "f8", 6)])
+
+        if iErr > 0:
+            # flagged vertex and its neighbors on either side
+            iStart = offsets[flagRings]
+            numPnts = offsets[flagRings + 1] - iStart
+            iPrev = iStart + (flagIdx - 1) % numPnts
+            iPnt = iStart + flagIdx
+            iNext = iStart + (flagIdx + 1) % numPnts
+            hits["fid"] = ringFids[flagRings]
+            hits["angle"] = flagAngles
+            hits["coords"] = np.hstack((coords[iPrev], coords[iPnt], coords[iNext]))
+
+        # Sort the flagged locations by angle
+        # This array will be used to create the output layers, smallest angles first
+        hits = hits[np.argsort(hits["angle"], kind="stable")]
 
         # Create output line featureclass containing acute angles that were flagged
         #
-        if len(dLines) > 0:
+        if iErr > 0:
             arcpy.env.addOutputsToMap = False
             # Found acute angles below specification
             AddMsgAndPrint("Saved " + splitThousands(iErr) + " sliver locations to the following 'QA' layers: ")
 
             # add flagged midpoints to new points featureclass
-            outLayer = MakeLineLayer(theCatalogPath, outputSR, minAngle)
-            outLayer2 = MakePointLayer(theCatalogPath, outputSR, minAngle)
+            outLayer = MakeLineLayer(theWorkspace, theExt, outputSR, minAngle)
+            outLayer2 = MakePointLayer(theWorkspace, theExt, outputSR, minAngle)
 
-            # combine output to both featureclasses in the same with statement
-            with arcpy.da.InsertCursor(os.path.join(arcpy.env.workspace, outLayer), ["SHAPE@", "POLYID", "ANGLE"]) as lineCursor:
+            # combine output to both featureclasses in the same with statement. Both are new,
+            # unversioned featureclasses so no edit session is needed.
+            with arcpy.da.InsertCursor(os.path.join(theWorkspace, outLayer), ["SHAPE@", "POLYID", "ANGLE"]) as lineCursor, \
+                 arcpy.da.InsertCursor(os.path.join(theWorkspace, outLayer2), ["SHAPE@XY", "POLYID", "ANGLE"]) as pntCursor:
 
                 # for each value that has a reported common-point, get the list of coordinates and the
-                # calculated angle from dLines dictionary and write to the output slivers featureclass
-                #for key, val in dLines.items():
-
-                iCnt = 0
-                for key in dAngles:
-                    pntList, fid, theAngle = dLines[key]
+                # calculated angle from the hits array and write to the output slivers featureclass
+                # and the vertex location to the point featureclass
+                for fid, theAngle, lineCoords in zip(hits["fid"].tolist(), hits["angle"].tolist(), hits["coords"].tolist()):
                     #AddMsgAndPrint("\tFID = " + str(fid), 0)
-                    pnt0 = arcpy.Point(pntList[0][0],pntList[0][1])
-                    pnt1 = arcpy.Point(pntList[1][0],pntList[1][1])
-                    pnt2 = arcpy.Point(pntList[2][0],pntList[2][1])
+                    pnt0 = arcpy.Point(lineCoords[0],lineCoords[1])
+                    pnt1 = arcpy.Point(lineCoords[2],lineCoords[3])
+                    pnt2 = arcpy.Point(lineCoords[4],lineCoords[5])
                     array = arcpy.Array([pnt0, pnt1, pnt2])
                     polyLine = arcpy.Polyline(array)
                     rowLine = (polyLine, fid, theAngle)
                     lineCursor.insertRow(rowLine)
 
+                    # write out angle as text with degrees
+                    rowPnt = ((lineCoords[2],lineCoords[3]), fid, f"{theAngle}{DEG}")
+                    pntCursor.insertRow(rowPnt)
+
             # create new featurelayer from sliver polylines
             layerPath = os.path.dirname(sys.argv[0])
             layerFile1 = os.path.join(layerPath,"Yellow_Line.lyr")
             #outLayerName = "QA Slivers (" + splitThousands(minAngle) + chr(176).decode(locale.getpreferredencoding()) + " angle)"
-            outLayerName = "QA Slivers (" + splitThousands(minAngle) + chr(176) + " angle)"
+            outLayerName = "QA Slivers (" + splitThousands(minAngle) + DEG + " angle)"
 
             arcpy.MakeFeatureLayer_management(outLayer, outLayerName)
             arcpy.ApplySymbologyFromLayer_management (outLayerName, layerFile1)
             arcpy.SetParameter(3, outLayerName)
             AddMsgAndPrint(" \n ", 0)
 
-            # Run through dictionary a second time, but now loading vertex locations into point featureclass
-            with arcpy.da.InsertCursor(os.path.join(arcpy.env.workspace, outLayer2), ["SHAPE@", "POLYID", "ANGLE"]) as pntCursor:
-
-                # for each value that has a reported common-point, get the list of coordinates and the
-                # calculated angle from dLines dictionary and write to the output slivers featureclass
-                for key in dAngles:
-                    pntList, fid, theAngle = dLines[key]
-                    #AddMsgAndPrint("\tFID = " + str(fid), 0)
-                    pnt1 = arcpy.Point(pntList[1][0],pntList[1][1])
-                    # write out angle as text with degrees
-                    sAngle = str(theAngle) + chr(176)#.decode(locale.getpreferredencoding())
-                    rowPnt = (pnt1, fid, sAngle)
-                    pntCursor.insertRow(rowPnt)
-
             # create new featurelayer from sliver vertices
             layerPath = os.path.dirname(sys.argv[0])
             layerFile2 = os.path.join(layerPath,"Red_SliverVertex.lyr")
-            outLayerName2 = "QA Sliver Vertex (" + splitThousands(minAngle) + chr(176) + " angle)"
+            outLayerName2 = "QA Sliver Vertex (" + splitThousands(minAngle) + DEG + " angle)"
             #outLayerName2 = "QA Sliver Vertex (" + splitThousands(minAngle) + chr(176).decode(locale.getpreferredencoding()) + " angle)"
             arcpy.MakeFeatureLayer_management(outLayer2, outLayerName2)
             arcpy.ApplySymbologyFromLayer_management (outLayerName2, layerFile2)
@@ -392,43 +523,20 @@ def ProcessLayer(inLayer, outputSR, minAngle, iSelection):
         return False
 
 ## ===================================================================================
-def MakeLineLayer(theCatalogPath, outputSR, minAngle):
+def MakeLineLayer(theWorkspace, theExt, outputSR, minAngle):
     # Create polyline featureclass with short line segments defining the acute angle
     # Return table to ProcessLayer so that records can be added.
+    # theWorkspace and theExt ("" or ".shp") are determined once from the output workspace
     #
     try:
-        # Set workspace to that of the input polygon featureclass
-        #loc = os.path.dirname(theCatalogPath)
-        loc = arcpy.env.workspace
-        desc = arcpy.Describe(loc)
-        dt = desc.dataType.upper()
+        errorLayer = "QA_Slivers_" + splitThousands(minAngle) + "d" + theExt
+        AddMsgAndPrint(" \n\t1. Output slivers layer: " + os.path.join(theWorkspace,errorLayer), 0)
 
-        if dt == "WORKSPACE":
-            arcpy.env.workspace = loc
-            ext = ""
-
-        elif dt == "FEATUREDATASET":
-            arcpy.env.workspace = os.path.dirname(loc)
-            ext = ""
-
-        elif dt == "FOLDER":
-            arcpy.env.workspace = loc
-            ext = ".shp"
-
-        else:
-            AddMsgAndPrint(" \n" + loc + " is a " + dt + " datatype", 2)
-            return ""
-
-        errorLayer = "QA_Slivers_" + splitThousands(minAngle) + "d" + ext
-        AddMsgAndPrint(" \n\t1. Output slivers layer: " + os.path.join(arcpy.env.workspace,errorLayer), 0)
-
-        if arcpy.Exists(os.path.join(arcpy.env.workspace, errorLayer)):
-            arcpy.Delete_management(os.path.join(arcpy.env.workspace, errorLayer))
-
-        arcpy.CreateFeatureclass_management(arcpy.env.workspace, errorLayer, "POLYLINE", "", "DISABLED","DISABLED", outputSR)
+        # overwriteOutput is set, so an existing featureclass is replaced without deleting it first
+        arcpy.CreateFeatureclass_management(theWorkspace, errorLayer, "POLYLINE", "", "DISABLED","DISABLED", outputSR)
 
         # create new fields to store objectid and minimum segment length found for each polygon
-        if arcpy.Exists(errorLayer):
+        if arcpy.Exists(os.path.join(theWorkspace, errorLayer)):
 
             try:
                 # "POLYID","ANGLE"
@@ -459,43 +567,20 @@ def MakeLineLayer(theCatalogPath, outputSR, minAngle):
         return ""
 
 ## ===================================================================================
-def MakePointLayer(theCatalogPath, outputSR, minAngle):
+def MakePointLayer(theWorkspace, theExt, outputSR, minAngle):
     # Create points featureclass containing midpoint coordinates for short line segments.
     # Return table to ProcessLayer so that records can be added.
+    # theWorkspace and theExt ("" or ".shp") are determined once from the output workspace
     #
     try:
-        # Set workspace to that of the input polygon featureclass
-        #loc = os.path.dirname(theCatalogPath)
-        loc = env.workspace
-        desc = arcpy.Describe(loc)
-        dt = desc.dataType.upper()
-
-        if dt == "WORKSPACE":
-            env.workspace = loc
-            ext = ""
-
-        elif dt == "FEATUREDATASET":
-            env.workspace = os.path.dirname(loc)
-            ext = ""
-
-        elif dt == "FOLDER":
-            env.workspace = loc
-            ext = ".shp"
-
-        else:
-            AddMsgAndPrint(" \n" + loc + " is a " + dt + " datatype", 2)
-            return ""
-
-        errorLayer = "QA_SliverPoints_" + splitThousands(minAngle) + "d" + ext
-        AddMsgAndPrint(" \n\t2. Output vertex point layer: " + os.path.join(env.workspace,errorLayer), 0)
+        errorLayer = "QA_SliverPoints_" + splitThousands(minAngle) + "d" + theExt
+        AddMsgAndPrint(" \n\t2. Output vertex point layer: " + os.path.join(theWorkspace,errorLayer), 0)
 
-        if arcpy.Exists(os.path.join(env.workspace, errorLayer)):
-            arcpy.Delete_management(os.path.join(env.workspace, errorLayer))
-
-        arcpy.CreateFeatureclass_management(env.workspace, errorLayer, "POINT", "", "DISABLED","DISABLED", outputSR)
+        # overwriteOutput is set, so an existing featureclass is replaced without deleting it first
+        arcpy.CreateFeatureclass_management(theWorkspace, errorLayer, "POINT", "", "DISABLED","DISABLED", outputSR)
 
         # create new fields to store objectid and minimum segment length found for each polygon
-        if arcpy.Exists(errorLayer):
+        if arcpy.Exists(os.path.join(theWorkspace, errorLayer)):
 
             try:
                 # "POLYID","ANGLE"
@@ -532,18 +617,36 @@ def splitThousands(someNumber):
        an integer.  Integer with or without thousands seperator is returned."""
 
     try:
-        return re.sub(r'(\d{3})(?=\d)', r'\1,', str(someNumber)[::-1])[::-1]
+        return format(someNumber, ",")
 
     except:
         errorMsg()
         return someNumber
 
 ## ===================================================================================
-import sys, string, os, locale, math, operator, traceback, re
-from collections import OrderedDict
+import sys, string, os, locale, math, operator, traceback, struct, time
+import numpy as np
 import arcpy
 from arcpy import env
 
+# degree symbol used in messages, layer names and the vertex point angle labels
+DEG = "\u00b0"
+
+# precompiled unsigned int readers for little and big endian WKB
+uintStruct = {"<": struct.Struct("<I"), ">": struct.Struct(">I")}
+
+# numba is optional; without it the angles are calculated with the NumPy version of
+# GetAngleFromPoints instead
+try:
+    from numba import njit, prange
+    ScanAngles = njit(cache=True, fastmath=True)(ScanAngles)
+    ScanAllAngles = njit(cache=True, parallel=True)(ScanAllAngles)
+    bNumba = True
+
+except ImportError:
+    prange = range
+    bNumba = False
+
 if __name__ == '__main__':
 
     try:
@@ -570,34 +673,48 @@ if __name__ == '__main__':
 
         # Setup: Get all required information from input layer
         # Describe input layer
-        desc = arcpy.Describe(inLayer)
-        theDataType = desc.dataType.upper()
-        theCatalogPath = desc.catalogPath
-        fidFld = desc.OIDFieldName
-        inputSR = desc.spatialReference
+        desc = arcpy.da.Describe(inLayer)
+        theDataType = desc["dataType"].upper()
+        theCatalogPath = desc["catalogPath"]
+        fidFld = desc["OIDFieldName"]
+        inputSR = desc["spatialReference"]
         inputDatum = inputSR.GCS.datumName
 
-        # Set output workspace
-        if arcpy.Describe(os.path.dirname(theCatalogPath)).dataType.upper() == "FEATUREDATASET":
+        # Set output workspace and the extension used for the output featureclasses
+        theWorkspace = os.path.dirname(theCatalogPath)
+        wsType = arcpy.da.Describe(theWorkspace)["dataType"].upper()
+
+        if wsType == "FEATUREDATASET":
             # if input layer is in a featuredataset, move up one level to the geodatabase
-            env.workspace = os.path.dirname(os.path.dirname(theCatalogPath))
+            theWorkspace = os.path.dirname(theWorkspace)
+            theExt = ""
+
+        elif wsType == "WORKSPACE":
+            theExt = ""
+
+        elif wsType == "FOLDER":
+            theExt = ".shp"
+
         else:
-            env.workspace = os.path.dirname(theCatalogPath)
+            AddMsgAndPrint(" \n" + theWorkspace + " is a " + wsType + " datatype", 2)
+            exit()
 
+        env.workspace = theWorkspace
         AddMsgAndPrint(" \nOutput workspace set to: " + env.workspace, 0)
 
         # Get total number of features for the input featureclass
-        iTotalFeatures = int(arcpy.GetCount_management(theCatalogPath).getOutput(0))
+        iTotalFeatures = int(arcpy.management.GetCount(theCatalogPath)[0])
 
         # Get input layer information and count the number of input features
         if theDataType == "FEATURELAYER":
             # input layer is a FEATURELAYER, get featurelayer specific information
-            defQuery = desc.whereClause
-            fids = desc.FIDSet
-            layerName = desc.nameString
+            defQuery = desc["whereClause"]
+            fids = desc["FIDSet"]
+            layerName = desc["nameString"]
 
-            # get count of number of features being processed
-            if fids == "":
+            # get count of number of features being processed. arcpy.da.Describe returns
+            # None for FIDSet when there is no selection
+            if not fids:
                 # No selected features in layer
                 iSelection = iTotalFeatures
 
@@ -607,8 +724,9 @@ if __name__ == '__main__':
                     AddMsgAndPrint(" \nProcessing all " + splitThousands(iTotalFeatures) + " polygons in '" + layerName + "'...", 0)
 
                 else:
-                    # There is a query definition, so the only option is to use GetCount
-                    iSelection = int(arcpy.GetCount_management(inLayer).getOutput(0))  # Use selected features code
+                    # There is a query definition, count the features it returns with a cursor
+                    with arcpy.da.SearchCursor(inLayer, ["OID@"]) as cnt:
+                        iSelection = sum(1 for row in cnt)
                     AddMsgAndPrint(" \nProcessing " + splitThousands(iSelection) + " of " + splitThousands(iTotalFeatures) + " features...", 0)
 
             else:
@@ -618,7 +736,7 @@ if __name__ == '__main__':
 
         elif theDataType in ("FEATURECLASS", "SHAPEFILE"):
             # input layer is a featureclass, get featureclass specific information
-            layerName = desc.baseName
+            layerName = desc["baseName"]
             defQuery = ""
             fids = ""
             iSelection = iTotalFeatures
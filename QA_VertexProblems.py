@@ -106,6 +106,30 @@ def CreateWebMercaturSR():
     except:
         errorMsg()
 
+## ===================================================================================
+def GetWorkerCount():
+    # Number of worker processes to use, from the parallelProcessingFactor environment
+    # setting. The factor is either a percentage of the CPU count ("75%") or a number of
+    # processes. Returns 1 when the setting is empty or cannot be read.
+    #
+    try:
+        factor = str(env.parallelProcessingFactor or "").strip()
+        iCPU = os.cpu_count() or 1
+
+        if factor == "":
+            return 1
+
+        elif factor.endswith("%"):
+            iWorkers = int(iCPU * float(factor[:-1]) / 100.0)
+
+        else:
+            iWorkers = int(float(factor))
+
+        return max(1, min(iWorkers, iCPU))
+
+    except:
+        return 1
+
 ## ===================================================================================
 def ProcessLayer(inLayer, outputSR, outLayer, minDist, iSelection):
     # All the real work is performed within this function
@@ -117,157 +141,200 @@ def ProcessLayer(inLayer, outputSR, outLayer, minDist, iSelection):
         #
         AddMsgAndPrint(" \nReading polygon geometry...", 0)
 
-        # Create a list of coordinate pairs that have been added to the table to prevent duplicates
-        #
-        lSegments = []
-
-        # create new table to store individual polygon statistics
-        # POLYID,ACRES,VERTICES,AVI,MIN_DIST,MULTIPART
-        statsTbl = MakeStatsTable(unitAbbrev)
+        # conversion from square map units to acres
+        if theUnits == "meters":
+            acreFactor = 1.0 / 4046.85643
 
-        if arcpy.Exists(statsTbl):
-            # open update cursor on polygon statistics table
-            iCursor = arcpy.da.InsertCursor(statsTbl, ["POLYID","ACRES","VERTICES","AVI","MIN_DIST","MULTIPART"])
+        elif theUnits == "feet_us":
+            acreFactor = 1.0 / 43560.0
 
         else:
+            AddMsgAndPrint("\nFailed to calculate acre value using unit: " + theUnits, 2)
             return False
 
-        # Process input featurelayer polygon geometry using search cursor
+        # Process input featurelayer polygon geometry. The cursor explodes each polygon to its
+        # vertices, one (fid, (x, y)) row per vertex, and the rows are grouped by polygon.
+        # arcpy cursors can only be used in this process, so all of the vertices are read first.
+        # They are copied into one coordinate buffer that is doubled in size whenever it fills up.
+        # The vertices for polygon i are coords[offsets[i]:offsets[i + 1]].
         #
         arcpy.SetProgressorLabel("Reading polygon geometry...")
         arcpy.SetProgressor("step", "Reading polygon geometry...",  0, iSelection, 1)
-        iCnt = 0
-        fieldList = ["OID@","SHAPE@","SHAPE@AREA","SHAPE@LENGTH"]
-        dPoints = dict()
+        coords = np.empty((65536, 2), dtype=np.float64)
+        nCapacity = coords.shape[0]
+        nCoords = 0
+        offsets = [0]
+        fids = list()
         bHasMultiPart = False
 
-        with arcpy.da.SearchCursor(inLayer, fieldList,"",outputSR) as sCursor:
+        with arcpy.da.SearchCursor(inLayer, ["OID@","SHAPE@XY"],"",outputSR,True) as sCursor:
             #SearchCursor (in_table, field_names, {where_clause}, {spatial_reference}, {explode_to_points}, {sql_clause})
 
-            for fid, feat, theArea, thePerimeter in sCursor:
-                # Process a polygon record. row[1] is the same as feat
-                #fid, feat, theArea, thePerimeter = row # do I need to worry about NULL geometry here?
+            for iPoly, (fid, vertices) in enumerate(itertools.groupby(sCursor, key=operator.itemgetter(0)), 1):
+                xy = [xy for oid, xy in vertices if not xy is None]
+                numPoints = len(xy)
 
-                if not feat is None:
-                    # check to make sure geometry object contains a single-part polygon
-                    iPartCnt = feat.partCount
+                if nCoords + numPoints > nCapacity:
+                    nCapacity = max(nCapacity * 2, nCoords + numPoints)
+                    newCoords = np.empty((nCapacity, 2), dtype=np.float64)
+                    newCoords[:nCoords] = coords[:nCoords]
+                    coords = newCoords
 
-                    if iPartCnt == 1:
-                        iPartCnt = 0
+                if numPoints > 0:
+                    coords[nCoords:nCoords + numPoints] = xy
 
-                    elif iPartCnt == 0:
-                        AddMsgAndPrint("Bad geometry for polygon #" + str(fid),2)
+                nCoords += numPoints
+                offsets.append(nCoords)
+                fids.append(fid)
 
-                    else:
-                      bHasMultiPart = True
+                # update the progressor every 1024 polygons
+                if (iPoly & 1023) == 0:
+                    arcpy.SetProgressorPosition(iPoly)
 
-                    # get the total number of points for this polygon
-                    iPnts = feat.pointCount
-                    iSeg = 1000000  # use an arbitrarily high segment length as the minimum for comparison
+        arcpy.SetProgressorPosition(len(fids))
 
-                    for part in feat:
-                        # accumulate 2 points for each segment
-                        pntList = []  # initialize points list for polygon
-                        pnt0 = part[0]
+        fids = np.asarray(fids, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        dVertices = dict(zip(fids.tolist(), np.diff(offsets).tolist()))  # number of vertices for each polygon
 
-                        for pnt in part:
-                            try:
-                                pntList.append((pnt.X,pnt.Y))
+        # Scan the polygons for short segments in chunks of 1000 polygons. The chunks are spread
+        # over worker processes when parallelProcessingFactor allows more than one and the layer
+        # has at least iPoolVertices vertices. A single process scans about 3 to 5 million vertices
+        # per second, while each worker takes about a second to start python, numpy and numba,
+        # so smaller layers are faster without workers.
+        #
+        chunkSize = 1000
+        iPoolVertices = 10000000
+        chunks = list()
 
-                            except:
-                                pass
+        for i in range(0, len(fids), chunkSize):
+            j = min(i + chunkSize, len(fids))
+            chunks.append((fids[i:j], coords[offsets[i]:offsets[j]], offsets[i:j + 1] - offsets[i]))
 
-                            if pnt:
-                                # add vertice or to-node coordinates to list
+        del coords
 
-                                if len(pntList) == 2:
-                                    # calculate current segment length using 2 points
-                                    dist = math.hypot(pntList[0][0] - pntList[1][0], pntList[0][1] - pntList[1][1] )
-                                    #AddMsgAndPrint("\tLen: " + str(dist), 0)
+        arcpy.SetProgressorLabel("Checking segment lengths...")
+        arcpy.SetProgressor("step", "Checking segment lengths...",  0, len(chunks), 1)
+        iWorkers = min(GetWorkerCount(), len(chunks)) if offsets[-1] >= iPoolVertices else 1
+        bMidpoints = outLayer != ""  # midpoints are only needed for the output points layer
+        results = list()
 
-                                    if dist < iSeg:
-                                        iSeg = dist
+        if iWorkers > 1:
+            pythonExe = multiprocessing.spawn.get_executable()
 
-                                    if dist < minDist:
-                                        iCnt += 1
+            try:
+                if os.path.basename(sys.executable).lower().startswith("arcgispro"):
+                    # inside ArcGIS Pro the worker processes have to be started with python itself
+                    multiprocessing.set_executable(os.path.join(sys.exec_prefix, "pythonw.exe"))
 
-                                        # get midpoint of short line segment for vertex flag placement
-                                        xm = (pntList[0][0] + pntList[1][0]) / 2.0
-                                        ym = (pntList[0][1] + pntList[1][1]) / 2.0
-                                        midPnt = [(xm,ym), fid, dist]
+                with concurrent.futures.ProcessPoolExecutor(max_workers=iWorkers) as pool:
+                    for result in pool.map(ScanPolygons, chunks, itertools.repeat(minDist), itertools.repeat(bMidpoints)):
+                        results.append(result)
+                        arcpy.SetProgressorPosition()
 
-                                        # print line segment that is less than specified distance
-                                        #AddMsgAndPrint("\t\tPolygon " + str(fid) + ":  " + str(midPnt), 0)
+            except:
+                AddMsgAndPrint(" \nUnable to use " + str(iWorkers) + " worker processes, checking polygons in a single process", 1)
+                results = list()
 
-                                        if fid in dPoints:
-                                            # add this point to the existing list for this polygon
-                                            dPoints[fid].append(midPnt)
+            finally:
+                # the executable is shared by the whole ArcGIS Pro session, put it back for other tools
+                multiprocessing.set_executable(pythonExe)
 
-                                        else:
-                                            # create new dictionary entry for this polygon
-                                            dPoints[fid] = [midPnt]
-                                            arcpy.SetProgressorLabel("Reading polygon geometry ( " + Number_Format(len(dPoints)) + " locations flagged )...")
+        if len(results) == 0:
+            arcpy.SetProgressor("step", "Checking segment lengths...",  0, len(chunks), 1)
 
-                                    # then drop the first point from the list
-                                    pntList.pop(0)
+            for chunk in chunks:
+                results.append(ScanPolygons(chunk, minDist, bMidpoints))
+                arcpy.SetProgressorPosition()
 
-                                # add the next point
-                                #pntList.append((pnt.X,pnt.Y))
+        # the shortest segment for each polygon and the polygon id, midpoint coordinates and
+        # length of each short segment, in the same order as the cursor
+        dMinSeg = dict()
+        dParts = dict()  # number of parts for each polygon
 
-                            else:
-                                # interior ring or end of polygon encountered,
-                                #AddMsgAndPrint("\tInterior Ring...", 0)
-                                pntList = []  # reset points list for interior ring
-                                break
+        for chunk, result in zip(chunks, results):
+            dMinSeg.update(zip(chunk[0].tolist(), result[0].tolist()))
+            dParts.update(zip(chunk[0].tolist(), result[5].tolist()))
 
-                else:
-                    # bad polygon geometry
-                    AddMsgAndPrint("NULL geometry for polygon #" + str(fid),2)
+        if len(results) > 0:
+            flagFid = np.concatenate([result[2] for result in results])
+            flagXY = np.concatenate([result[3] for result in results])
+            flagDist = np.concatenate([result[4] for result in results])
 
-                #POLYID,ACRES,VERTICES,AVI,MIN_DIST,MULTIPART
-                if theUnits == "meters":
-                    acres = theArea / 4046.85643
+        else:
+            flagFid = np.empty(0, dtype=np.int64)
+            flagXY = np.empty((0, 2), dtype=np.float64)
+            flagDist = np.empty(0, dtype=np.float64)
 
-                elif theUnits == "feet_us":
-                    acres = theArea / 43560.0
+        iCnt = sum(result[1] for result in results)  # number of short segments
+        del chunks, results
+
+        # Second, lighter cursor without explode_to_points or geometry objects for the polygon
+        # area and perimeter. The vertex count is the number of rows returned for the polygon by
+        # the exploded cursor and the part count is the number of exterior rings found in them.
+        #
+        arcpy.SetProgressorLabel("Saving polygon statistics...")
+        fieldList = ["OID@","SHAPE@AREA","SHAPE@LENGTH"]
+        statRows = list()
+
+        with arcpy.da.SearchCursor(inLayer, fieldList,"",outputSR) as sCursor:
+
+            for fid, theArea, thePerimeter in sCursor:
+
+                if not theArea is None:
+                    # check to make sure geometry object contains a single-part polygon
+                    iPartCnt = dParts.get(fid, 0)
+
+                    if iPartCnt == 1:
+                        iPartCnt = 0
+
+                    elif iPartCnt == 0:
+                        AddMsgAndPrint("Bad geometry for polygon #" + str(fid),2)
+
+                    else:
+                      bHasMultiPart = True
+
+                    # get the total number of points for this polygon
+                    iPnts = dVertices[fid]
+                    iSeg = dMinSeg.get(fid, 1000000)
 
                 else:
-                    AddMsgAndPrint("\nFailed to calculate acre value using unit: " + theUnits, 2)
-                    return False
+                    # bad polygon geometry
+                    AddMsgAndPrint("NULL geometry for polygon #" + str(fid),2)
 
+                #POLYID,ACRES,VERTICES,AVI,MIN_DIST,MULTIPART
+                acres = theArea * acreFactor
                 avi = thePerimeter / iPnts
-                outRow = [fid, acres,iPnts,avi,iSeg,iPartCnt]
-                iCursor.insertRow(outRow)
-                arcpy.SetProgressorPosition()
+                statRows.append((fid, acres,iPnts,avi,iSeg,iPartCnt))
+
+        # create new table to store individual polygon statistics
+        # POLYID,ACRES,VERTICES,AVI,MIN_DIST,MULTIPART
+        stats = np.array(statRows, dtype=[("POLYID", "i4"), ("ACRES", "f8"), ("VERTICES", "i4"), ("AVI", "f8"), ("MIN_DIST", "f8"), ("MULTIPART", "i2")])
+        del statRows
+        statsTbl = MakeStatsTable(stats, unitAbbrev)
 
-        del outRow
-        del iCursor
+        if statsTbl == "":
+            return False
 
         if bHasMultiPart:
             AddMsgAndPrint("Input layer has multipart polygons that require editing (explode)", 2)
 
-        if outLayer != "" and len(dPoints) > 0:
+        if outLayer != "" and iCnt > 0:
             # pairs of close vertices were flagged and need to be exported as midpoints in a new featureclass
             AddMsgAndPrint("\nFlagged " + Number_Format(iCnt, 0, True) + " segments shorter than " + str(minDist) + " " + theUnits,1)
 
-            # add flagged midpoints to new points featureclass
-            outLayer = MakePointsLayer(outputSR, minDist, unitAbbrev)
-
+            # add flagged midpoints to new points featureclass. The midpoint, polygon id and
+            # length of each short segment are copied into one array and written at once.
             arcpy.SetProgressorLabel("Saving midpoint of each short segment...")
-            arcpy.SetProgressor("step", "Saving midpoint of each short segment...",  0, iCnt, 1)
-
-            with arcpy.da.InsertCursor(os.path.join(env.workspace, outLayer), ["SHAPE@","POLYID","LENGTH_" + unitAbbrev]) as pntCursor:
-
-                # for each value that has a reported common-point, get the list of coordinates from
-                # the dDups dictionary and write to the output Common_Points featureclass
-                for fid in dPoints.keys():
-                    pnts = dPoints[fid]
-
-                    for pnt in pnts:
-                        #AddMsgAndPrint("\t" + str(fid) + ": " + str(pnt[0]) + ", " + str(pnt[1]) + ", " + str(pnt[2]), 0)
-                        pntCursor.insertRow(pnt)
+            points = np.empty(iCnt, dtype=[("XY", "f8", 2), ("POLYID", "i4"), ("LENGTH_" + unitAbbrev.upper(), "f8")])
+            points["XY"] = flagXY
+            points["POLYID"] = flagFid
+            points["LENGTH_" + unitAbbrev.upper()] = flagDist
+            outLayer = MakePointsLayer(points, outputSR, minDist, unitAbbrev)
+            del points
 
-                    arcpy.SetProgressorPosition()
+            if outLayer == "":
+                return False
 
             # create join between input polygon layer and QA_VertexStats table
             # "QA_VertexStats"
@@ -298,9 +365,11 @@ def ProcessLayer(inLayer, outputSR, outLayer, minDist, iSelection):
         return False
 
 ## ===================================================================================
-def MakePointsLayer(outputSR, minDist, unitAbbrev):
-    # Create points shapefile in memory containing midpoint coordinates for short line segments.
-    # Return table to ProcessLayer so that records can be added.
+def MakePointsLayer(points, outputSR, minDist, unitAbbrev):
+    # Create points featureclass containing midpoint coordinates for short line segments.
+    # points is a structured array with XY, POLYID and LENGTH_<units> fields that is written
+    # to the featureclass in one step with NumPyArrayToFeatureClass.
+    # Return the featureclass name to ProcessLayer.
     #
     try:
         # Set workspace to that of the input polygon featureclass
@@ -323,15 +392,16 @@ def MakePointsLayer(outputSR, minDist, unitAbbrev):
 
         pointsLayer = "QA_VertexFlags_" + str(minDist).replace(".", "_") + ext
         AddMsgAndPrint(" \nOutput points layer: " + os.path.join(env.workspace,pointsLayer), 1)
-        arcpy.CreateFeatureclass_management(env.workspace, pointsLayer, "POINT", "", "DISABLED","DISABLED", outputSR)
 
-        # create new fields to store objectid and minimum segment length found for each polygon
-        if arcpy.Exists(pointsLayer):
+        if arcpy.Exists(os.path.join(env.workspace, pointsLayer)):
+            arcpy.Delete_management(os.path.join(env.workspace, pointsLayer))
+
+        # "POLYID","LENGTH" fields come from the points array
+        arcpy.da.NumPyArrayToFeatureClass(points, os.path.join(env.workspace, pointsLayer), ["XY"], outputSR)
+
+        if arcpy.Exists(os.path.join(env.workspace, pointsLayer)):
 
             try:
-                # "POLYID","SEGNO","LENGTH"
-                arcpy.AddField_management(pointsLayer, "POLYID", "LONG")
-                arcpy.AddField_management(pointsLayer, "LENGTH" + "_" + unitAbbrev.upper(), "DOUBLE", "12", "3")
                 # Add new field to track status of each point
                 arcpy.AddField_management(pointsLayer, "Status", "TEXT", "", "", 10, "Status")
 
@@ -358,8 +428,9 @@ def MakePointsLayer(outputSR, minDist, unitAbbrev):
         return ""
 
 ## ===================================================================================
-def MakeStatsTable(unitAbbrev):
-    # Create join table containing polygon statistics
+def MakeStatsTable(stats, unitAbbrev):
+    # Create join table containing polygon statistics from the stats array, all of the
+    # rows are written at once with NumPyArrayToTable.
     # At the end, this table will be joined to the input featureclass so that values
     # can be mapped to show where the layer has issues.
     #
@@ -378,34 +449,28 @@ def MakeStatsTable(unitAbbrev):
             if arcpy.Exists(statsTbl):
                 arcpy.Delete_management(statsTbl)
 
-            arcpy.CreateTable_management(os.path.dirname(statsTbl), os.path.basename(statsTbl))
+            # POLYID,ACRES,VERTICES,AVI,MIN_DIST,MULTIPART fields come from the array
+            arcpy.da.NumPyArrayToTable(stats, statsTbl)
             #AddMsgAndPrint("Created polygon stats table (" + statsTbl + ")", 1)
 
         except:
             errorMsg()
             return ""
 
-        try:
-            # POLYID,ACRES,VERTICES,AVI,MIN_DIST,MULTIPART
-            #AddField_management (in_table, field_name, field_type, {field_precision}, {field_scale}, {field_length}, {field_alias}, {field_is_nullable}, {field_is_required}, {field_domain})
-            arcpy.AddField_management(statsTbl, "POLYID", "LONG","","","", "PolygonID")
-            arcpy.AddField_management(statsTbl, "ACRES", "DOUBLE", "12", "1","", "Acres")
-            arcpy.AddField_management(statsTbl, "VERTICES", "LONG", "12","","", "Vertex Count")
-            arcpy.AddField_management(statsTbl, "AVI", "DOUBLE", "12", "1", "", "Avg Segment (" + unitAbbrev + ")")
-            arcpy.AddField_management(statsTbl, "MIN_DIST", "DOUBLE", "12", "3", "", "Min Segment (" + unitAbbrev + ")")
-            arcpy.AddField_management(statsTbl, "MULTIPART", "SHORT", "", "", "", "Is Multipart")
-
+        if theExtension == "":
+            # field aliases are not supported for dbf tables
             try:
-                if arcpy.ListFields(statsTbl, "Field1")[0] == "Field1":
-                    AddMsgAndPrint("Deleting extra FIELD1 field", 0)
-                    arcpy.DeleteField_management(statsTbl, "Field1")
+                #AlterField_management (in_table, field, {new_field_name}, {new_field_alias}, {field_type}, {field_length}, {field_is_nullable}, {clear_field_alias})
+                arcpy.AlterField_management(statsTbl, "POLYID", new_field_alias="PolygonID")
+                arcpy.AlterField_management(statsTbl, "ACRES", new_field_alias="Acres")
+                arcpy.AlterField_management(statsTbl, "VERTICES", new_field_alias="Vertex Count")
+                arcpy.AlterField_management(statsTbl, "AVI", new_field_alias="Avg Segment (" + unitAbbrev + ")")
+                arcpy.AlterField_management(statsTbl, "MIN_DIST", new_field_alias="Min Segment (" + unitAbbrev + ")")
+                arcpy.AlterField_management(statsTbl, "MULTIPART", new_field_alias="Is Multipart")
 
             except:
-                pass
-
-        except:
-            errorMsg()
-            return ""
+                errorMsg()
+                return ""
 
         return statsTbl
 
@@ -419,7 +484,7 @@ def RemoveJoins(inputLayer, theWildcard):
     # inputLayer could also be a standalone table
 
     try:
-        theJoinList = []
+        theJoinSet = set()
         desc = arcpy.Describe(inputLayer)
 
         if desc.DataType.upper() == "FEATURELAYER":
@@ -432,6 +497,11 @@ def RemoveJoins(inputLayer, theWildcard):
 
         fieldList = desc.fields
 
+        # joined field names are qualified with their table name, without any
+        # qualified names there is no join to remove
+        if not any("." in theField.name for theField in fieldList):
+            return True
+
         for theField in fieldList:
             fullName = theField.name
             nameList = arcpy.ParseFieldName(fullName).split(",")
@@ -439,15 +509,15 @@ def RemoveJoins(inputLayer, theWildcard):
             fieldName = nameList[3]
             tableName = fullName[0:-(len(fieldName))]
 
-            if tableName != theFC and not tableName in theJoinList:
+            if tableName != theFC and not tableName in theJoinSet:
                 # Found join, but only remove it if it matches wildcard
                 if theWildcard == "" and tableName != " ":
-                    theJoinList.append(tableName)
+                    theJoinSet.add(tableName)
                     AddMsgAndPrint(" \nRemoving join: " + tableName, 0)
                     arcpy.RemoveJoin_management(inLayer, tableName)
 
                 elif tableName.startswith(theWildcard):
-                    theJoinList.append(tableName)
+                    theJoinSet.add(tableName)
                     AddMsgAndPrint(" \nRemoving join: " + tableName, 0)
                     arcpy.RemoveJoin_management(inLayer, tableName)
 
@@ -460,13 +530,12 @@ def RemoveJoins(inputLayer, theWildcard):
 ## ===================================================================================
 def Number_Format(num, places=0, bCommas=True):
     try:
-    # Format a number according to locality and given places
-        #locale.setlocale(locale.LC_ALL, "")
+    # Format a number with the given places and optional thousands separators
         if bCommas:
-            theNumber = locale.format("%.*f", (places, num), True)
+            theNumber = f"{num:,.{places}f}"
 
         else:
-            theNumber = locale.format("%.*f", (places, num), False)
+            theNumber = f"{num:.{places}f}"
         return theNumber
 
     except:
@@ -475,8 +544,17 @@ def Number_Format(num, places=0, bCommas=True):
 
 ## ===================================================================================
 ## MAIN
-import sys, string, os, locale, math, operator, traceback, arcpy
-from arcpy import env
+import sys, string, os, locale, math, operator, traceback, itertools, multiprocessing, multiprocessing.spawn, concurrent.futures
+import numpy as np
+
+# the short segment scan only needs numpy (and numba when it is installed)
+from QA_VertexScan import ScanPolygons
+
+# worker processes import this script again as __mp_main__ but only run ScanPolygons,
+# so they skip arcpy
+if __name__ != '__mp_main__':
+    import arcpy
+    from arcpy import env
 
 if __name__ == '__main__':
 
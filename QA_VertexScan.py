@@ -0,0 +1,185 @@
+# ---------------------------------------------------------------------------
+# QA_VertexScan.py
+#
+# Short segment scan used by QA_VertexProblems.py.
+#
+# These functions only use numpy (and numba when it is installed) so that the worker
+# processes started by QA_VertexProblems.py for large layers do not have to import arcpy.
+# There is no try/except here, errors are raised to ProcessLayer in QA_VertexProblems.py
+# which reports them with errorMsg.
+#
+
+## ===================================================================================
+def GetExteriorRings(pts):
+    # Split the exploded vertices of one polygon into rings and return the exterior rings.
+    # Each ring ends at the vertex that repeats its first vertex. Exterior rings are
+    # clockwise (negative signed area) and interior rings are counterclockwise.
+    # pts is an (N,2) array, the returned rings include their closing vertex.
+    #
+    rings = list()
+    ringEnds = list()  # index just past the closing vertex of each ring
+    i = 0
+
+    while i < len(pts):
+        # a ring has at least 3 vertices before the closing vertex. The closing vertex is
+        # looked for in windows that double in size, so each ring is only compared up to
+        # about twice its own length instead of against the rest of the polygon.
+        iStart = i + 3
+        iWindow = 64
+        iEnd = len(pts)
+
+        while iStart < len(pts):
+            hits = np.flatnonzero((pts[iStart:iStart + iWindow] == pts[i]).all(axis=1))
+
+            if len(hits) > 0:
+                iEnd = iStart + hits[0] + 1
+                break
+
+            iStart += iWindow
+            iWindow *= 2
+
+        i = iEnd
+        ringEnds.append(i)
+
+    if len(ringEnds) == 0:
+        return rings
+
+    for ring in np.split(pts, ringEnds[:-1]):
+        # signed area (x2), relative to the first vertex to keep the products small
+        x = ring[:, 0] - ring[0, 0]
+        y = ring[:, 1] - ring[0, 1]
+
+        if np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]) <= 0:
+            rings.append(ring)
+
+    return rings
+
+## ===================================================================================
+def ScanRing(ring, minDist, bMidpoints):
+    # Find the shortest segment in a closed ring and every segment shorter than minDist
+    # in a single loop. Written without try/except or Python objects so that it can be
+    # compiled by numba when it is available.
+    # Returns the shortest length, the number of flagged segments and, when bMidpoints
+    # is True, the midpoint and length of each flagged segment.
+    # Squared lengths are compared so that the square root is only taken for the
+    # shortest segment and the flagged segments.
+    #
+    n = len(ring) - 1
+    nOut = max(n, 0) if bMidpoints else 0
+    flagPnts = np.empty((nOut, 2), dtype=np.float64)
+    flagDists = np.empty(nOut, dtype=np.float64)
+    minDist2 = minDist * minDist
+    minSeg2 = 1000000.0 * 1000000.0
+    k = 0
+
+    for i in range(n):
+        dx = ring[i + 1, 0] - ring[i, 0]
+        dy = ring[i + 1, 1] - ring[i, 1]
+        dist2 = dx * dx + dy * dy
+
+        if dist2 < minSeg2:
+            minSeg2 = dist2
+
+        if dist2 < minDist2:
+            if bMidpoints:
+                # midpoint of the short segment for vertex flag placement
+                flagPnts[k, 0] = (ring[i, 0] + ring[i + 1, 0]) * 0.5
+                flagPnts[k, 1] = (ring[i, 1] + ring[i + 1, 1]) * 0.5
+                flagDists[k] = math.sqrt(dist2)
+
+            k += 1
+
+    m = k if bMidpoints else 0
+    return math.sqrt(minSeg2), k, flagPnts[:m], flagDists[:m]
+
+## ===================================================================================
+def ScanPolygons(chunk, minDist, bMidpoints):
+    # Check the exterior rings of a chunk of polygons for short segments.
+    # chunk is (fids, coords, offsets), the vertices for polygon i are
+    # coords[offsets[i]:offsets[i + 1]].
+    # Runs in a worker process for large layers, so it does not use arcpy.
+    # Returns the shortest segment length for each polygon, the number of segments shorter
+    # than minDist, when bMidpoints is True the polygon id, midpoint coordinates and
+    # length of each of those segments, and the number of parts (exterior rings) for each polygon.
+    #
+    fids, coords, offsets = chunk
+    minDist2 = minDist * minDist
+    minSegs = np.empty(len(fids), dtype=np.float64)
+    partCounts = np.zeros(len(fids), dtype=np.int64)
+    iCnt = 0  # number of short segments
+    iOut = 0  # number of short segments stored
+
+    # the short segments are stored in 3 arrays that are doubled in size when they fill up:
+    # polygon id, midpoint coordinates and segment length. The first iOut values are used.
+    flagFid = np.empty(1024, dtype=np.int64)
+    flagXY = np.empty((1024, 2), dtype=np.float64)
+    flagDist = np.empty(1024, dtype=np.float64)
+
+    for iPoly, fid in enumerate(fids.tolist()):
+        pts = coords[offsets[iPoly]:offsets[iPoly + 1]]
+        iSeg = 1000000  # use an arbitrarily high segment length as the minimum for comparison
+
+        # exterior ring of each part, interior rings are not checked
+        rings = GetExteriorRings(pts)
+        partCounts[iPoly] = len(rings)
+
+        for ring in rings:
+
+            if bNumba:
+                minSeg, k, midPnts, segDists = ScanRing(ring, minDist, bMidpoints)
+
+            elif len(ring) > 1:
+                # squared length of every segment in the ring, the square root is
+                # only needed for the shortest and the flagged segments
+                dx = np.diff(ring[:, 0])
+                dy = np.diff(ring[:, 1])
+                dists2 = dx * dx + dy * dy
+                minSeg = math.sqrt(dists2.min())
+
+                # segments shorter than the minimum distance and their midpoints
+                idx = np.flatnonzero(dists2 < minDist2)
+                k = len(idx)
+
+                if not bMidpoints:
+                    idx = idx[:0]
+
+                midPnts = (ring[idx] + ring[idx + 1]) * 0.5
+                segDists = np.sqrt(dists2[idx])
+
+            else:
+                continue
+
+            iSeg = min(iSeg, minSeg)
+            iCnt += k
+
+            k = len(segDists)
+
+            if k > 0:
+                if iOut + k > len(flagFid):
+                    newSize = max(len(flagFid) * 2, iOut + k)
+                    flagFid = np.resize(flagFid, newSize)
+                    flagXY = np.resize(flagXY, (newSize, 2))
+                    flagDist = np.resize(flagDist, newSize)
+
+                # add the midpoint of each short segment for this polygon
+                flagFid[iOut:iOut + k] = fid
+                flagXY[iOut:iOut + k] = midPnts
+                flagDist[iOut:iOut + k] = segDists
+                iOut += k
+
+        minSegs[iPoly] = iSeg
+
+    return minSegs, iCnt, flagFid[:iOut], flagXY[:iOut], flagDist[:iOut], partCounts
+
+## ===================================================================================
+import math
+import numpy as np
+
+# numba is optional; without it the segment lengths are calculated with NumPy instead
+try:
+    from numba import njit
+    ScanRing = njit(cache=True, fastmath=True)(ScanRing)
+    bNumba = True
+
+except ImportError:
+    bNumba = False